@@ -1,143 +1,242 @@
 # Standard library imports
 import argparse
+import logging
 import os
 import sys
 import webbrowser
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from itertools import chain
+from operator import itemgetter
 
 # Third-party imports
-from dateutil import parser
 import gitlab
+from gitlab.v4.objects import Group, Project
 import jinja2
+from requests.adapters import HTTPAdapter
 
-def get_gitlab_connection():
-    """Create a GitLab connection using personal access token."""
+# Default number of GitLab requests kept in flight at once
+DEFAULT_WORKERS = 16
+
+logger = logging.getLogger(__name__)
+
+def get_gitlab_connection(pool_size=DEFAULT_WORKERS):
+    """Create a GitLab connection using personal access token.
+
+    The connection pool keeps `pool_size` connections alive, it should be at
+    least the number of concurrent requests.
+    """
     # Get token from environment variable for security
     token = os.getenv('GITLAB_TOKEN')
     if not token:
-        print("Error: GITLAB_TOKEN environment variable not set", flush=True)
+        logger.error("Error: GITLAB_TOKEN environment variable not set")
         sys.exit(1)
     
     # Get GitLab URL, default to gitlab.com
     gitlab_url = os.getenv('GITLAB_URL', 'https://gitlab.com')
     
     try:
-        return gitlab.Gitlab(gitlab_url, private_token=token)
+        # Retry on 5xx errors, python-gitlab already waits and retries on 429
+        gl = gitlab.Gitlab(gitlab_url, private_token=token, retry_transient_errors=True)
     except Exception as e:
-        print(f"Error connecting to GitLab: {e}", flush=True)
+        logger.error("Error connecting to GitLab: %s", e)
         sys.exit(1)
 
-def get_branch_details(project, branch_name):
-    """Get detailed information about a specific branch."""
+    # Reuse the connections across the concurrent requests instead of reopening them
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    gl.session.mount('https://', adapter)
+    gl.session.mount('http://', adapter)
+    return gl
+
+def get_branch_details(branch, mr):
+    """Get detailed information about a specific branch.
+
+    `branch` is the branch as returned by the branch listing, it already
+    contains the protection status and the last commit.
+    `mr` is the most recent merge request having the branch as source, or None.
+    """
+    # Get branch protection status
+    is_protected = branch.protected
+    
+    # Get the commit details
+    commit = branch.commit
+    last_committer = commit['committer_name']
+    # GitLab returns ISO 8601 dates, possibly with a 'Z' suffix that fromisoformat() only accepts from Python 3.11
+    last_commit_date = datetime.fromisoformat(commit['committed_date'].replace('Z', '+00:00'))
+    
+    mr_info = None
+    mr_state = None
+    merged_into = None
+    
+    if mr:
+        mr_info = f"<A HREF='{mr.web_url}'>!{mr.iid}</A>"
+        mr_state = mr.state
+        if mr.state == 'merged':
+            merged_into = mr.target_branch
+    
+    return {
+        'last_committer': last_committer,
+        'last_commit_date': last_commit_date,
+        'is_protected': is_protected,
+        'merged_into': merged_into,
+        'merge_request': mr_info,
+        'mr_state': mr_state
+    }
+
+def get_merge_requests_by_branch(project):
+    """Get the most recent merge request of each source branch of a project.
+
+    Return None if the merge requests cannot be listed.
+    """
+    # Get all merge requests at once (most recent first) rather than one request per branch,
+    # the pages are consumed as they arrive and only the most recent MR of each branch is kept
+    mr_by_branch = {}
     try:
-        branch = project.branches.get(branch_name)
-        
-        # Get branch protection status
-        is_protected = branch.protected
-        
-        # Get the commit details
-        commit = branch.commit
-        last_committer = commit['committer_name']
-        last_commit_date = parser.parse(commit['committed_date'])
-        
-        # Get merge requests associated with this branch
-        mrs = project.mergerequests.list(source_branch=branch_name, state='all', get_all=True)
-        mr_info = None
-        mr_state = None
-        merged_into = None
-        
-        if mrs:
-            mr = mrs[0]  # Get the first MR (most recent)
-            mr_info = f"<A HREF='{mr.web_url}' TARGET='_blank'>!{mr.iid}</A>"
-            mr_state = mr.state
-            if mr.state == 'merged':
-                merged_into = mr.target_branch
-        
-        return {
-            'last_committer': last_committer,
-            'last_commit_date': last_commit_date,
-            'is_protected': is_protected,
-            'merged_into': merged_into,
-            'merge_request': mr_info,
-            'mr_state': mr_state
-        }
+        for mr in project.mergerequests.list(state='all', order_by='created_at', sort='desc', iterator=True, per_page=100):
+            mr_by_branch.setdefault(mr.source_branch, mr)
     except gitlab.exceptions.GitlabError as e:
-        print(f"Error getting branch details: {e}", flush=True)
+        logger.error("Error getting merge requests of project %s: %s", project.path_with_namespace, e)
         return None
+    return mr_by_branch
+
+def get_details_of_all_branches_of_project(project, mr_executor, min_age=None, skip_protected=False):
+    """Get the report rows of the branches of a project.
 
-def get_details_of_all_branches_of_project(project):
+    The merge requests are listed on `mr_executor` while the branches are listed.
+
+    If `min_age` is set, branches whose last commit is less than `min_age` days old
+    are left out of the report, as well as protected branches if `skip_protected` is set.
+    If the branches or the merge requests cannot be listed, the project is skipped.
+    """
 
     branch_data = []
 
+    # List the merge requests in the background while the branches are listed
+    mr_by_branch_future = mr_executor.submit(get_merge_requests_by_branch, project)
+
     # Get all branches
     try:
-        branches = project.branches.list(all=True)
+        branches = project.branches.list(get_all=True, per_page=100)
     except gitlab.exceptions.GitlabError as e:
-        print(f"Error getting branches of project {project.path_with_namespace}: {e}", flush=True)
-        sys.exit(1)
-    
+        logger.error("Error getting branches of project %s: %s", project.path_with_namespace, e)
+        logger.warning("Skipping project: %s", project.path_with_namespace)
+        # Do not wait for the merge requests of a skipped project
+        mr_by_branch_future.cancel()
+        return []
+
+    mr_by_branch = mr_by_branch_future.result()
+    if mr_by_branch is None:
+        logger.warning("Skipping project: %s", project.path_with_namespace)
+        return []
+
+    now = datetime.now(timezone.utc)
+
+    # The project cells are the same for all branches
+    archived = 'Yes' if project.archived else 'No'
+    project_link = f"<A HREF='{project.web_url}'>{project.path_with_namespace}</A>"
+
     for branch in branches:
-        print(f"Processing branch: {branch.name}", flush=True)
-        details = get_branch_details(project, branch.name)
-    
-        if details:
-            branch_data.append([
-                'Yes' if project.archived else 'No',
-                f"<A HREF='{project.web_url}' TARGET='_blank'>{project.path_with_namespace}</A>",
-                f"<A HREF='{project.web_url}/tree/{branch.name}' TARGET='_blank'>{branch.name}</A>",
-                details['last_committer'],
-                details['last_commit_date'].strftime('%Y-%m-%d %H:%M:%S'),
-                'Yes' if details['is_protected'] else 'No',
-                details['merged_into'] if details['merged_into'] else '',
-                details['merge_request'] if details['merge_request'] else '',
-                details['mr_state'] if details['mr_state'] else '',
-                f"<A HREF='{project.web_url}/-/branches?state=all&search={branch.name}' TARGET='_blank'>⤳</A>"
-            ])
-
-    # Sort branch data by commit date (oldest first)
-    branch_data.sort(key=lambda x: datetime.strptime(x[4], '%Y-%m-%d %H:%M:%S'))
+        if skip_protected and branch.protected:
+            continue
+        details = get_branch_details(branch, mr_by_branch.get(branch.name))
+        # A commit dated slightly in the future (clock skew) has a negative age
+        age_days = (now - details['last_commit_date']).days
+        if min_age is not None and age_days < min_age:
+            continue
+        logger.info("Processing branch: %s", branch.name)
+
+        # The cells are fully formatted here, so that the template only has to emit them
+        mr_state = details['mr_state']
+        # Classes used by the filters of the report
+        row_classes = []
+        if details['is_protected']:
+            row_classes.append('protected-branch')
+        if project.archived:
+            row_classes.append('archived-project')
+        branch_data.append({
+            'row_class': ' '.join(row_classes),
+            'archived': archived,
+            'project_link': project_link,
+            'branch_link': f"<A HREF='{project.web_url}/tree/{branch.name}'>{branch.name}</A>",
+            'last_committer': details['last_committer'],
+            'last_commit_date': details['last_commit_date'],
+            'last_commit_day': details['last_commit_date'].strftime('%Y-%m-%d'),
+            'last_commit_datetime': details['last_commit_date'].strftime('%Y-%m-%d %H:%M:%S'),
+            'protected': 'Yes' if details['is_protected'] else 'No',
+            'merged_into': details['merged_into'] if details['merged_into'] else '',
+            'merge_request': details['merge_request'] if details['merge_request'] else '',
+            'mr_state': f'<span class="mr-state mr-state-{mr_state}">{mr_state}</span>' if mr_state else '',
+            'branches_link': f"<A HREF='{project.web_url}/-/branches?state=all&search={branch.name}'>⤳</A>",
+            'age_days': age_days
+        })
 
     return branch_data
 
-def get_all_projects_of_group(gl, group):
-    """Recursively get all projects from a group and its subgroups."""
-    print(f"Getting projects from group: {group.full_path}", flush=True)
-    
-    projects = []
-    
-    # Get direct projects from this group
+def get_all_projects_of_group(gl, group, max_workers=DEFAULT_WORKERS):
+    """Yield all projects from a group and its subgroups, in a single listing.
+
+    The projects are yielded page by page as the listing is fetched.
+    """
+    logger.info("Getting projects from group: %s and its subgroups", group.full_path)
+
+    listed_ids = set()
     try:
-        direct_projects = group.projects.list(all=True)
-        shared_projects = group.shared_projects.list(all=True)
+        for project in group.projects.list(include_subgroups=True, with_shared=False, iterator=True, per_page=100):
+            logger.info("  Got project: %s", project.path_with_namespace)
+            listed_ids.add(project.id)
+            # The listed GroupProject has no branch or merge request manager,
+            # build a Project from its attributes instead of fetching it again
+            yield Project(gl.projects, project.attributes)
     except gitlab.exceptions.GitlabError as e:
-        print(f"Error getting projects of group {group.full_path}: {e}", flush=True)
-        sys.exit(1)
-    for project in direct_projects:
-        if project in shared_projects:
-            print(f"  Skipping shared project: {project.path_with_namespace}", flush=True)
-        else:
-            print(f"  Got project: {project.path_with_namespace}", flush=True)
-            projects.append(project)
-    
-    # Get subgroups and their projects
+        logger.error("Error getting projects of group %s and its subgroups: %s", group.full_path, e)
+        logger.warning("Falling back to walking the subgroups one by one")
+        # Do not yield again the projects of the pages fetched before the error
+        for project in get_all_projects_of_group_level_by_level(gl, group, max_workers):
+            if project.id not in listed_ids:
+                yield project
+
+def get_all_projects_of_group_level_by_level(gl, group, max_workers=DEFAULT_WORKERS):
+    """Yield all projects from a group and its subgroups, walking the subgroup tree breadth-first.
+
+    The listings of all the groups of a same level are requested concurrently.
+    """
+    level = [group]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while level:
+            listings = [
+                (level_group,
+                 executor.submit(list_group_items, level_group, level_group.projects, 'projects'),
+                 executor.submit(list_group_items, level_group, level_group.shared_projects, 'shared projects'),
+                 executor.submit(list_group_items, level_group, level_group.subgroups, 'subgroups'))
+                for level_group in level
+            ]
+            level = []
+            for level_group, direct_projects, shared_projects, subgroups in listings:
+                logger.info("Getting projects from group: %s", level_group.full_path)
+                shared_project_ids = {project.id for project in shared_projects.result()}
+                for project in direct_projects.result():
+                    if project.id in shared_project_ids:
+                        logger.info("  Skipping shared project: %s", project.path_with_namespace)
+                    else:
+                        logger.info("  Got project: %s", project.path_with_namespace)
+                        # The listed GroupProject has no branch or merge request manager,
+                        # build a Project from its attributes instead of fetching it again
+                        yield Project(gl.projects, project.attributes)
+                # Build the full subgroup objects from the listed attributes
+                level.extend(Group(gl.groups, subgroup.attributes) for subgroup in subgroups.result())
+
+def list_group_items(group, manager, item_name):
+    """List all the items of one of the managers (projects, subgroups...) of a group.
+
+    Return an empty list if the items cannot be listed, so that the rest of the report is still generated.
+    """
     try:
-        subgroups = group.subgroups.list(all=True)
+        return manager.list(get_all=True, per_page=100)
     except gitlab.exceptions.GitlabError as e:
-        print(f"Error getting subgroups of group {group.full_path}: {e}", flush=True)
-        sys.exit(1)
-    for subgroup in subgroups:
-        # Get the full subgroup object
-        try:
-            full_subgroup = gl.groups.get(subgroup.id)
-        except gitlab.exceptions.GitlabError as e:
-            print(f"Error getting group {subgroup.id}: {e}", flush=True)
-            sys.exit(1)
-        # Recursively get projects from subgroup
-        projects.extend(get_all_projects_of_group(gl, full_subgroup))
-    
-    return projects
+        logger.error("Error getting %s of group %s: %s", item_name, group.full_path, e)
+        return []
 
-def get_all_projects(gl, path):
+def get_all_projects(gl, path, max_workers=DEFAULT_WORKERS):
     try:
         # If path is a project, return it
         project = gl.projects.get(path)
@@ -147,17 +246,17 @@ def get_all_projects(gl, path):
         try:
             group = gl.groups.get(path)
         except gitlab.exceptions.GitlabGetError as e:
-            print(f"Error while getting group {path}: {e}", flush=True)
+            logger.error("Error while getting group %s: %s", path, e)
             sys.exit(1)
-        return get_all_projects_of_group(gl, group)
+        return get_all_projects_of_group(gl, group, max_workers)
 
-def generate_html_report(report_data, path_name):
-    """Generate an HTML report from the branch data."""
-    template = """
+# HTML template of the report, compiled once at import
+REPORT_TEMPLATE = jinja2.Environment(autoescape=False, trim_blocks=True, lstrip_blocks=True).from_string("""
 <!DOCTYPE html>
 <html>
 <head>
     <title>GitLab Branch Report - {{ path_name }}</title>
+    <base target="_blank">
     <style>
         body {
             font-family: Arial, sans-serif;
@@ -276,8 +375,13 @@ def generate_html_report(report_data, path_name):
         a:hover {
             text-decoration: underline;
         }
-        tr.protected-branch {
-            /* No special styling needed, used for filtering */
+        /* Filtering, the classes of tbody are set from the checkboxes */
+        tbody.hide-protected tr.protected-branch,
+        tbody.hide-archived tr.archived-project,
+        tbody.hide-archive-groups tr.archive-group,
+        tbody.hide-mirror-group tr.mirror-group,
+        tbody.hide-sandbox-group tr.sandbox-group {
+            display: none;
         }
         .mr-state {
             text-transform: capitalize;
@@ -351,7 +455,7 @@ def generate_html_report(report_data, path_name):
                 days
             </span>
         </div>
-        <table>
+        <table data-generated="{{ generated }}">
             <thead>
                 <tr>
                     {% for header in headers %}
@@ -359,29 +463,10 @@ def generate_html_report(report_data, path_name):
                     {% endfor %}
                 </tr>
             </thead>
-            <tbody>
-                {% for row in data %}
-                <tr class="{{ 'protected-branch' if row[5] == 'Yes' }}" 
-                    data-commit-date="{{ row[4] }}"
-                    style="{{ 'display: none;' if row[5] == 'Yes' }}">
-                    <td>{{ row[0] }}</td>
-                    <td class="project-cell">{{ row[1] }}</td>
-                    <td class="branch-cell">{{ row[2] }}</td>
-                    <td>{{ row[3] }}</td>
-                    <td class="date-cell">
-                        <span class="date-only">{{ row[4].split(' ')[0] }}</span>
-                        <span class="full-datetime">{{ row[4] }}</span>
-                    </td>
-                    <td>{{ row[5] }}</td>
-                    <td>{{ row[6] }}</td>
-                    <td>{{ row[7] }}</td>
-                    <td>
-                        {% if row[8] %}
-                        <span class="mr-state mr-state-{{ row[8] }}">{{ row[8] }}</span>
-                        {% endif %}
-                    </td>
-                    <td>{{ row[9] | safe }}</td>
-                </tr>
+            <tbody class="hide-protected">
+                {# The rows are already rendered, one per line #}
+                {% for row_html in rows %}
+                {{ row_html }}
                 {% endfor %}
             </tbody>
         </table>
@@ -398,37 +483,40 @@ def generate_html_report(report_data, path_name):
             const hideSandboxGroupCheckbox = document.getElementById('hideSandboxGroup');
             const hideYoungCheckbox = document.getElementById('hideYoungBranches');
             const minAgeInput = document.getElementById('minAge');
+            const tbody = document.querySelector('tbody');
             const rows = document.querySelectorAll('tbody tr');
+            const ageFilterStyle = document.createElement('style');
+            document.head.appendChild(ageFilterStyle);
+
+            // Tag the rows of the groups which can be hidden
+            rows.forEach(row => {
+                const href = row.cells[1].querySelector('a').getAttribute('href');
+                row.classList.toggle('archive-group', href.includes('/archive/'));
+                row.classList.toggle('mirror-group', href.includes('/henixdevelopment/open-source/squash/'));
+                row.classList.toggle('sandbox-group', href.includes('/henixdevelopment/sandbox/'));
+            });
+
+            // The ages are computed when the report is generated, add the days elapsed since then
+            const msPerDay = 1000 * 60 * 60 * 24;
+            const generated = parseInt(document.querySelector('table').dataset.generated, 10);
+            const elapsedDays = Math.floor((Date.now() - generated) / msPerDay);
+            const distinctAges = [...new Set(Array.from(rows, row => parseInt(row.dataset.ageDays, 10)))];
 
             function updateVisibility() {
-                const hideProtected = hideProtectedCheckbox.checked;
-                const hideArchived = hideArchivedCheckbox.checked;
-                const hideArchiveGroups = hideArchiveGroupsCheckbox.checked;
-                const hideMirrorGroup = hideMirrorGroupCheckbox.checked;
-                const hideSandboxGroup = hideSandboxGroupCheckbox.checked;
-                const hideYoung = hideYoungCheckbox.checked;
+                tbody.classList.toggle('hide-protected', hideProtectedCheckbox.checked);
+                tbody.classList.toggle('hide-archived', hideArchivedCheckbox.checked);
+                tbody.classList.toggle('hide-archive-groups', hideArchiveGroupsCheckbox.checked);
+                tbody.classList.toggle('hide-mirror-group', hideMirrorGroupCheckbox.checked);
+                tbody.classList.toggle('hide-sandbox-group', hideSandboxGroupCheckbox.checked);
+
+                // Hide the young branches with a single rule listing their ages
                 const minAgeDays = parseInt(minAgeInput.value);
-                const now = new Date();
-
-                rows.forEach(row => {
-                    const isProtected = row.classList.contains('protected-branch');
-                    const isArchived = row.cells[0].textContent.trim() === 'Yes';
-                    const isArchiveGroup = row.cells[1].querySelector('a').getAttribute('href').includes('/archive/');
-                    const isMirrorGroup = row.cells[1].querySelector('a').getAttribute('href').includes('/henixdevelopment/open-source/squash/');
-                    const isSandboxGroup = row.cells[1].querySelector('a').getAttribute('href').includes('/henixdevelopment/sandbox/');
-                    const commitDate = new Date(row.getAttribute('data-commit-date'));
-                    const ageDays = (now - commitDate) / (1000 * 60 * 60 * 24);
-
-                    const shouldHide = 
-                        (hideProtected && isProtected) ||
-                        (hideArchived && isArchived) ||
-                        (hideArchiveGroups && isArchiveGroup) ||
-                        (hideMirrorGroup && isMirrorGroup) ||
-                        (hideSandboxGroup && isSandboxGroup) ||
-                        (hideYoung && ageDays < minAgeDays);
-
-                    row.style.display = shouldHide ? 'none' : '';
-                });
+                const youngAges = hideYoungCheckbox.checked
+                    ? distinctAges.filter(age => age + elapsedDays < minAgeDays)
+                    : [];
+                ageFilterStyle.textContent = youngAges.length
+                    ? youngAges.map(age => `tbody tr[data-age-days="${age}"]`).join(',') + ' { display: none; }'
+                    : '';
             }
 
             hideProtectedCheckbox.addEventListener('change', updateVisibility);
@@ -453,63 +541,118 @@ def generate_html_report(report_data, path_name):
     </script>
 </body>
 </html>
+""")
+
+# HTML of a report row, formatted with the fields of the row
+# (rendered with str.format() rather than Jinja, since it is the hot loop of the report)
+ROW_TEMPLATE = (
+    '<tr class="{row_class}" data-age-days="{age_days}">'
+    '<td>{archived}</td>'
+    '<td class="project-cell">{project_link}</td>'
+    '<td class="branch-cell">{branch_link}</td>'
+    '<td>{last_committer}</td>'
+    '<td class="date-cell">'
+    '<span class="date-only">{last_commit_day}</span>'
+    '<span class="full-datetime">{last_commit_datetime}</span>'
+    '</td>'
+    '<td>{protected}</td>'
+    '<td>{merged_into}</td>'
+    '<td>{merge_request}</td>'
+    '<td>{mr_state}</td>'
+    '<td>{branches_link}</td>'
+    '</tr>'
+)
+
+def generate_html_report(report_data, path_name):
+    """Generate an HTML report from the branch data.
+
+    `report_data` can be any iterable of rows, the report is streamed to the
+    file as the rows are consumed.
     """
     
     headers = ['Arc.', 'Project', 'Branch', 'Last Committer', 'Last Commit Date', 
                'Protected', 'Merged Into', 'MR', 'MR State', '']
     
-    # Create Jinja2 environment and template
-    env = jinja2.Environment()
-    template = env.from_string(template)
-    
-    # Generate HTML
-    html_content = template.render(
+    # Generate HTML and write it to file chunk by chunk
+    now = datetime.now()
+    output_file = 'gitlab_branch_report.html'
+    stream = REPORT_TEMPLATE.stream(
         headers=headers,
-        data=report_data,
+        rows=map(ROW_TEMPLATE.format_map, report_data),
         path_name=path_name,
-        timestamp=datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        timestamp=now.strftime('%Y-%m-%d %H:%M:%S'),
+        generated=int(now.timestamp() * 1000)
     )
-    
-    # Write to file
-    output_file = 'gitlab_branch_report.html'
+    # Join the small template chunks (a few per row) before each write
+    stream.enable_buffering(size=100)
     with open(output_file, 'w', encoding='utf-8') as f:
-        f.write(html_content)
+        stream.dump(f)
     
     # Get absolute path for the file
     abs_path = os.path.abspath(output_file)
     return abs_path
 
+def positive_int(value):
+    """Argument type accepting only strictly positive integers."""
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"'{value}' is not a positive integer")
+    return number
+
 def main():
-    parser = argparse.ArgumentParser(description='Generate GitLab branch report')
-    parser.add_argument('path', help='Group or project path (e.g., mygroup or mygroup/myproject)')
-    parser.add_argument('-d', '--display', action='store_true', help='Open the report in browser after generation')
-    args = parser.parse_args()
+    arg_parser = argparse.ArgumentParser(description='Generate GitLab branch report')
+    arg_parser.add_argument('path', help='Group or project path (e.g., mygroup or mygroup/myproject)')
+    arg_parser.add_argument('-d', '--display', action='store_true', help='Open the report in browser after generation')
+    # The default number of workers can be set in the environment, to tune it for a given GitLab instance,
+    # it is kept as a string so that argparse validates it with the type of the option
+    default_workers = os.getenv('GITLAB_REPORT_WORKERS', str(DEFAULT_WORKERS))
+    arg_parser.add_argument('-w', '--workers', type=positive_int, default=default_workers,
+                            help=f'Number of concurrent GitLab requests (default: GITLAB_REPORT_WORKERS or {DEFAULT_WORKERS})')
+    arg_parser.add_argument('-a', '--min-age', type=int,
+                            help='Leave out the branches whose last commit is younger than this number of days')
+    arg_parser.add_argument('-p', '--skip-protected', action='store_true', help='Leave out the protected branches')
+    args = arg_parser.parse_args()
+
+    # The messages are logged from several threads, logging keeps each of them on its own line
+    logging.basicConfig(level=logging.INFO, format='%(message)s', stream=sys.stdout)
     
-    gl = get_gitlab_connection()
+    # The project workers, their merge request listings and the listing of the projects
+    # (up to as many workers when walking the subgroups one by one) all run at the same time
+    gl = get_gitlab_connection(3 * args.workers)
     
     try:
-        # Get all projects (single project or all projects in group)
-        all_projects = get_all_projects(gl, args.path)
-        print(f"Found {len(all_projects)} projects in total", flush=True)
-        
-        report_data = []
+        # Get all projects (single project or all projects in group), the projects of a group are listed lazily
+        all_projects = get_all_projects(gl, args.path, args.workers)
         
-        for project in all_projects:
-            # Get the full project object
-            proj = gl.projects.get(project.id)
-            print(f"\nProcessing project: {proj.path_with_namespace}", flush=True)
-            report_data.extend(get_details_of_all_branches_of_project(proj))
+        def process_project(project):
+            logger.info("\nProcessing project: %s", project.path_with_namespace)
+            return get_details_of_all_branches_of_project(project, mr_executor, args.min_age, args.skip_protected)
+
+        # Process the projects concurrently, each one as soon as it is listed,
+        # so that the project listing and the branch fetching overlap,
+        # the merge requests of the projects are listed on a second pool
+        with ThreadPoolExecutor(max_workers=args.workers) as executor, \
+             ThreadPoolExecutor(max_workers=args.workers) as mr_executor:
+            project_data = list(executor.map(process_project, all_projects))
+        logger.info("\nProcessed %s projects in total", len(project_data))
+        report_data = list(chain.from_iterable(project_data))
+
+        # Sort branch data of all projects by commit date (oldest first)
+        report_data.sort(key=itemgetter('last_commit_date'))
 
         # Generate HTML report
         output_file = generate_html_report(report_data, args.path)
-        print(f"\nReport generated successfully: {output_file}", flush=True)
+        logger.info("\nReport generated successfully: %s", output_file)
         
         # Only open in browser if -d flag is used
         if args.display:
             webbrowser.open('file://' + output_file)
         
     except gitlab.exceptions.GitlabError as e:
-        print(f"Error: {e}", flush=True)
+        logger.error("Error: %s", e)
         sys.exit(1)
 
 if __name__ == '__main__':